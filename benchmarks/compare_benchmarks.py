@@ -4,10 +4,25 @@ Generic benchmark comparison tool that can compare any two benchmark results.
 Supports both Python vs Mojo and branch vs branch comparisons.
 """
 
+import bisect
+import io
 import json
+import math
 import sys
 from typing import Tuple
 
+try:
+    # Optional: orjson parses result files several times faster
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+
+# Speedup boundaries between the status labels in the detailed report
+STATUS_THRESHOLDS = (0.5, 0.9, 1.1, 2, 10)
+
 
 def load_results(filename: str) -> dict:
     """Load benchmark results from JSON file.
@@ -19,8 +34,8 @@ def load_results(filename: str) -> dict:
         Dictionary with benchmark data
     """
     try:
-        with open(filename, "r") as f:
-            return json.load(f)
+        with open(filename, "rb") as f:
+            return _loads(f.read())
     except FileNotFoundError:
         print(f"Error: Results file '{filename}' not found", file=sys.stderr)
         sys.exit(1)
@@ -61,6 +76,38 @@ def format_time(time_ms: float) -> str:
         return f"{time_ms:.2f} ms"
 
 
+def summarize_speedups(speedups: list) -> Tuple[float, float, int, int]:
+    """Reduce a non-empty list of speedups to summary statistics.
+
+    Args:
+        speedups: Speedup factors, one per compared benchmark
+
+    Returns:
+        Tuple of (arithmetic mean, geometric mean, test faster count,
+        baseline faster count)
+    """
+    test_faster = 0
+    baseline_faster = 0
+    for speedup in speedups:
+        if speedup > 1:
+            test_faster += 1
+        elif speedup < 1:
+            baseline_faster += 1
+
+    average = math.fsum(speedups) / len(speedups)
+
+    # Geometric mean (better for ratios). Summed in log space with fsum
+    # so a long suite cannot overflow or underflow a running product; a
+    # zero speedup makes the mean zero, as the product would.
+    if min(speedups) > 0:
+        log_sum = math.fsum(map(math.log, speedups))
+        geometric_mean = math.exp(log_sum / len(speedups))
+    else:
+        geometric_mean = 0.0
+
+    return average, geometric_mean, test_faster, baseline_faster
+
+
 def detect_comparison_type(baseline_results: dict, test_results: dict) -> tuple:
     """Detect the type of comparison being performed.
 
@@ -119,6 +166,15 @@ def detect_comparison_type(baseline_results: dict, test_results: dict) -> tuple:
         return (baseline_name, test_name, title)
 
 
+def _completed(results: dict) -> dict:
+    """Drop benchmarks that were aborted by the harness timeout."""
+    return {
+        name: result
+        for name, result in results.items()
+        if not result.get("timed_out")
+    }
+
+
 def create_comparison_report(
     baseline_results: dict, test_results: dict
 ) -> Tuple[dict, str]:
@@ -153,116 +209,113 @@ def create_comparison_report(
         "benchmarks": {},
     }
 
-    # Build comparison data
-    all_benchmarks = set(baseline_results["results"].keys()) | set(
-        test_results["results"].keys()
-    )
+    # Per-benchmark keys depend only on the engine names, so build them once
+    baseline_time_key = f"{baseline_name.lower()}_time_ms"
+    test_time_key = f"{test_name.lower()}_time_ms"
+    baseline_iterations_key = f"{baseline_name.lower()}_iterations"
+    test_iterations_key = f"{test_name.lower()}_iterations"
+
+    # Build comparison data. Only benchmarks present in both result sets can
+    # be compared, so walk the sorted intersection of their names.
+    baseline_by_name = _completed(baseline_results["results"])
+    test_by_name = _completed(test_results["results"])
+    common_benchmarks = sorted(baseline_by_name.keys() & test_by_name.keys())
     speedups = []
 
-    for benchmark in sorted(all_benchmarks):
-        baseline_result = baseline_results["results"].get(benchmark)
-        test_result = test_results["results"].get(benchmark)
-
-        if baseline_result and test_result:
-            baseline_time = baseline_result["time_ms"]
-            test_time = test_result["time_ms"]
-            speedup = calculate_speedup(baseline_time, test_time)
-
-            comparison_data["benchmarks"][benchmark] = {
-                f"{baseline_name.lower()}_time_ms": baseline_time,
-                f"{test_name.lower()}_time_ms": test_time,
-                "speedup": speedup,
-                f"{baseline_name.lower()}_iterations": baseline_result[
-                    "iterations"
-                ],
-                f"{test_name.lower()}_iterations": test_result["iterations"],
-                "engine": test_result.get("engine", "N/A"),
-            }
-
-            speedups.append(speedup)
-            if speedup > 1:
-                comparison_data["summary"]["test_faster_count"] += 1
-            elif speedup < 1:
-                comparison_data["summary"]["baseline_faster_count"] += 1
+    for benchmark in common_benchmarks:
+        baseline_result = baseline_by_name[benchmark]
+        test_result = test_by_name[benchmark]
+
+        baseline_time = baseline_result["time_ms"]
+        test_time = test_result["time_ms"]
+        speedup = calculate_speedup(baseline_time, test_time)
+
+        comparison_data["benchmarks"][benchmark] = {
+            baseline_time_key: baseline_time,
+            test_time_key: test_time,
+            "speedup": speedup,
+            baseline_iterations_key: baseline_result["iterations"],
+            test_iterations_key: test_result["iterations"],
+            "engine": test_result.get("engine", "N/A"),
+        }
+
+        speedups.append(speedup)
 
     # Calculate summary statistics
     if speedups:
-        comparison_data["summary"]["total_benchmarks"] = len(speedups)
-        comparison_data["summary"]["average_speedup"] = sum(speedups) / len(
-            speedups
+        average, geometric_mean, test_faster, baseline_faster = (
+            summarize_speedups(speedups)
         )
-
-        # Geometric mean (better for ratios)
-        product = 1.0
-        for s in speedups:
-            product *= s
-        comparison_data["summary"]["geometric_mean_speedup"] = product ** (
-            1.0 / len(speedups)
+        comparison_data["summary"].update(
+            total_benchmarks=len(speedups),
+            average_speedup=average,
+            geometric_mean_speedup=geometric_mean,
+            test_faster_count=test_faster,
+            baseline_faster_count=baseline_faster,
         )
 
-    # Create formatted report
-    report = []
-    report.append("=" * 100)
-    report.append(comparison_title)
-    report.append("=" * 100)
-    report.append("")
+    # Create formatted report, written line by line into one buffer
+    report = io.StringIO()
+    write = report.write
+    write("=" * 100 + "\n")
+    write(comparison_title + "\n")
+    write("=" * 100 + "\n")
+    write("\n")
 
     # Summary
     summary = comparison_data["summary"]
-    report.append("SUMMARY:")
-    report.append(f"  Total benchmarks compared: {summary['total_benchmarks']}")
-    report.append(
-        f"  {test_name} faster: {summary['test_faster_count']} benchmarks"
-    )
-    report.append(
+    write("SUMMARY:\n")
+    write(f"  Total benchmarks compared: {summary['total_benchmarks']}\n")
+    write(f"  {test_name} faster: {summary['test_faster_count']} benchmarks\n")
+    write(
         f"  {baseline_name} faster:"
-        f" {summary['baseline_faster_count']} benchmarks"
+        f" {summary['baseline_faster_count']} benchmarks\n"
     )
-    report.append(f"  Average speedup: {summary['average_speedup']:.2f}x")
-    report.append(
-        f"  Geometric mean speedup: {summary['geometric_mean_speedup']:.2f}x"
+    write(f"  Average speedup: {summary['average_speedup']:.2f}x\n")
+    write(
+        f"  Geometric mean speedup: {summary['geometric_mean_speedup']:.2f}x\n"
     )
-    report.append("")
-    report.append(
+    write("\n")
+    write(
         f"  Note: Speedup > 1.0 means {test_name} is faster than"
-        f" {baseline_name}"
+        f" {baseline_name}\n"
     )
-    report.append("")
+    write("\n")
 
     # Detailed results
-    report.append("DETAILED RESULTS:")
-    report.append("-" * 110)
-    report.append(
-        f"{'Benchmark':<35} {f'{baseline_name} (ms)':>15} {f'{test_name} (ms)':>15} {'Speedup':>10} {'Engine':>8} {'Status':>15}"
+    write("DETAILED RESULTS:\n")
+    write("-" * 110 + "\n")
+    write(
+        f"{'Benchmark':<35} {f'{baseline_name} (ms)':>15} {f'{test_name} (ms)':>15} {'Speedup':>10} {'Engine':>8} {'Status':>15}\n"
+    )
+    write("-" * 110 + "\n")
+
+    # One status label per STATUS_THRESHOLDS bucket, slowest first
+    statuses = (
+        f"⚠ {baseline_name} faster",
+        f"← {baseline_name} slight",
+        "≈ Similar",
+        f"→ {test_name} slight",
+        f"✓ {test_name} faster",
+        f"🚀 {test_name} wins!",
     )
-    report.append("-" * 110)
 
     for benchmark, data in sorted(comparison_data["benchmarks"].items()):
-        baseline_time = data[f"{baseline_name.lower()}_time_ms"]
-        test_time = data[f"{test_name.lower()}_time_ms"]
+        baseline_time = data[baseline_time_key]
+        test_time = data[test_time_key]
         speedup = data["speedup"]
 
-        if speedup > 10:
-            status = f"🚀 {test_name} wins!"
-        elif speedup > 2:
-            status = f"✓ {test_name} faster"
-        elif speedup > 1.1:
-            status = f"→ {test_name} slight"
-        elif speedup > 0.9:
-            status = "≈ Similar"
-        elif speedup > 0.5:
-            status = f"← {baseline_name} slight"
-        else:
-            status = f"⚠ {baseline_name} faster"
+        # Thresholds are exclusive lower bounds, hence bisect_left
+        status = statuses[bisect.bisect_left(STATUS_THRESHOLDS, speedup)]
 
         engine = data.get("engine", "N/A")
-        report.append(
+        write(
             f"{benchmark:<35} {format_time(baseline_time):>15} {format_time(test_time):>15} {speedup:>9.2f}x"
-            f" {engine:>8} {status:>15}"
+            f" {engine:>8} {status:>15}\n"
         )
 
-    report.append("-" * 110)
-    report.append("")
+    write("-" * 110 + "\n")
+    write("\n")
 
     # Top performers
     sorted_by_speedup = sorted(
@@ -271,16 +324,17 @@ def create_comparison_report(
         reverse=True,
     )
 
-    report.append(f"TOP 5 SPEEDUPS ({test_name} vs {baseline_name}):")
+    write(f"TOP 5 SPEEDUPS ({test_name} vs {baseline_name}):\n")
     for i, (benchmark, data) in enumerate(sorted_by_speedup[:5]):
-        report.append(f"  {i + 1}. {benchmark}: {data['speedup']:.2f}x faster")
+        write(f"  {i + 1}. {benchmark}: {data['speedup']:.2f}x faster\n")
 
-    report.append("")
-    report.append("BOTTOM 5 SPEEDUPS:")
+    write("\n")
+    # Newlines lead these entries so the report has no trailing newline
+    write("BOTTOM 5 SPEEDUPS:")
     for i, (benchmark, data) in enumerate(sorted_by_speedup[-5:]):
-        report.append(f"  {i + 1}. {benchmark}: {data['speedup']:.2f}x")
+        write(f"\n  {i + 1}. {benchmark}: {data['speedup']:.2f}x")
 
-    return comparison_data, "\n".join(report)
+    return comparison_data, report.getvalue()
 
 
 def main():
@@ -11,6 +11,19 @@ import os
 from datetime import datetime
 
 
+# Engine detection lines:
+# [ENGINE] literal_match_short -> Pattern: 'hello' | Engine: DFA | Complexity: SIMPLE
+ENGINE_LINE_RE = re.compile(r"\[ENGINE\][ \t]+(\S+)[ \t]+->.*?Engine:[ \t]+(\S+)")
+
+# Benchmark result rows, anchored at the start of a line:
+# | literal_match_short       |   0.00001621246337890 |   8300 |
+# [ \t] rather than \s keeps a match from running across line breaks.
+RESULT_ROW_RE = re.compile(
+    r"^\|[ \t]*(\S+)[ \t]*\|[ \t]*([\d.eE+-]+)[ \t]*\|[ \t]*(\d+)[ \t]*\|",
+    re.MULTILINE,
+)
+
+
 def parse_mojo_benchmark_output(output: str) -> dict:
     """Parse Mojo benchmark output and extract results.
 
@@ -23,39 +36,26 @@ def parse_mojo_benchmark_output(output: str) -> dict:
     results = {}
     engine_map = {}
 
-    # Pattern to match engine detection lines:
-    # [ENGINE] literal_match_short -> Pattern: 'hello' | Engine: DFA | Complexity: SIMPLE
-    engine_pattern = r"\[ENGINE\]\s+(\S+)\s+->.*?Engine:\s+(\S+)"
-
-    # Pattern to match benchmark result lines:
-    # | literal_match_short       |   0.00001621246337890 |   8300 |
-    result_pattern = r"\|\s*(\S+)\s*\|\s*([\d.eE+-]+)\s*\|\s*(\d+)\s*\|"
-
     # First pass: extract engine information
-    for line in output.split("\n"):
-        engine_match = re.search(engine_pattern, line)
-        if engine_match:
-            name = engine_match.group(1)
-            engine = engine_match.group(2)
-            engine_map[name] = engine
-
-    # Second pass: extract benchmark results
-    for line in output.split("\n"):
-        match = re.match(result_pattern, line)
-        if match:
-            name = match.group(1)
-            time_ms = float(match.group(2))
-            iterations = int(match.group(3))
-
-            # Convert ms to ns for consistency with Python results
-            time_ns = time_ms * 1_000_000
-
-            results[name] = {
-                "time_ns": time_ns,
-                "time_ms": time_ms,
-                "iterations": iterations,
-                "engine": engine_map.get(name, "N/A"),
-            }
+    for engine_match in ENGINE_LINE_RE.finditer(output):
+        engine_map[engine_match.group(1)] = engine_match.group(2)
+
+    # Second pass: extract benchmark results, scanning the whole buffer
+    # instead of splitting it into lines
+    for match in RESULT_ROW_RE.finditer(output):
+        name = match.group(1)
+        time_ms = float(match.group(2))
+        iterations = int(match.group(3))
+
+        # Convert ms to ns for consistency with Python results
+        time_ns = time_ms * 1_000_000
+
+        results[name] = {
+            "time_ns": time_ns,
+            "time_ms": time_ms,
+            "iterations": iterations,
+            "engine": engine_map.get(name, "N/A"),
+        }
 
     return results
 
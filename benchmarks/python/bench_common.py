@@ -0,0 +1,365 @@
+"""
+Shared helpers for the Python benchmark scripts.
+
+bench_engine.py and simd_focused_benchmark.py both mirror their Mojo
+counterparts; the pieces that are not specific to one suite (CLI flag
+parsing, engine selection, statistics, test data, GC control,
+interpreter reporting and JSON export) live here so both scripts stay in
+sync.
+"""
+
+import csv
+import gc
+import importlib
+import json
+import os
+import platform
+import re
+import signal
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+try:
+    # Optional: orjson serializes several times faster than json
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+except ImportError:
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, indent=2).encode("utf-8")
+
+
+# ===-----------------------------------------------------------------------===#
+# CLI flags
+# ===-----------------------------------------------------------------------===#
+
+
+def arg_has(flag: str) -> bool:
+    """True if `flag` appears as a bare argv entry."""
+    return flag in sys.argv[1:]
+
+
+def arg_value(prefix: str) -> str:
+    """Return the suffix of an argv entry starting with `prefix`, or empty."""
+    for arg in sys.argv[1:]:
+        if arg.startswith(prefix):
+            return arg[len(prefix) :]
+    return ""
+
+
+# ===-----------------------------------------------------------------------===#
+# Regex Engines
+# ===-----------------------------------------------------------------------===#
+
+# Engines selectable with --engine; each module exposes re's compile() API
+ENGINES = ("re", "re2", "regex")
+
+# Shorthand classes whose meaning ASCII narrows (\d, \w, \s, \b and their
+# negations); an escaped backslash before the letter does not count
+_SHORTHAND_CLASS = re.compile(r"(?<!\\)(?:\\\\)*\\[dDwWsSbB]")
+
+
+def engine_name() -> str:
+    """Engine selected with --engine=<name>, defaulting to re."""
+    return arg_value("--engine=") or "re"
+
+
+@lru_cache(maxsize=None)
+def load_engine(name: str):
+    """Import the regex module for `name`, exiting if it is unavailable."""
+    if name not in ENGINES:
+        print(
+            f"Error: unknown engine '{name}', expected one of {ENGINES}",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        print(f"Error: engine '{name}' is not installed", file=sys.stderr)
+        sys.exit(1)
+
+
+@lru_cache(maxsize=256)
+def compile_regex(pattern):
+    """Compile `pattern` with the engine selected on the command line.
+
+    str patterns using \\d, \\w, \\s or \\b get ASCII under re and regex, so
+    those classes are ASCII-only like the Mojo engine's (RE2's already
+    are, as are bytes patterns). Other patterns compile unchanged.
+    Benchmarks that share a pattern reuse the compiled object.
+    """
+    engine = load_engine(engine_name())
+    if (
+        engine.__name__ in ("re", "regex")
+        and isinstance(pattern, str)
+        and _SHORTHAND_CLASS.search(pattern)
+    ):
+        return engine.compile(pattern, engine.ASCII)
+    return engine.compile(pattern)
+
+
+# ===-----------------------------------------------------------------------===#
+# Statistics
+# ===-----------------------------------------------------------------------===#
+
+
+def find_median(times: list) -> float:
+    """Find median of an already sorted list of times."""
+    n = len(times)
+    if n == 0:
+        return 0.0
+    if n % 2 == 1:
+        return times[n // 2]
+    return (times[n // 2 - 1] + times[n // 2]) / 2.0
+
+
+def find_percentile(times: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list of times."""
+    if not times:
+        return 0.0
+    return times[min(len(times) - 1, int(fraction * len(times)))]
+
+
+# ===-----------------------------------------------------------------------===#
+# Test Data
+# ===-----------------------------------------------------------------------===#
+
+
+def repeat_to_length(pattern: str, length: int) -> str:
+    """Repeat `pattern` to exactly `length` characters ("" if length <= 0).
+
+    Repeats once past the target and trims, so the result is built with a
+    single multiply and slice rather than a multiply, a remainder slice
+    and a concatenation copy.
+    """
+    if length <= 0:
+        return ""
+    repeats = -(-length // len(pattern))
+    return (pattern * repeats)[:length]
+
+
+# ===-----------------------------------------------------------------------===#
+# Measurement Environment
+# ===-----------------------------------------------------------------------===#
+
+
+@contextmanager
+def gc_disabled():
+    """Disable the cyclic GC while timing, as timeit does.
+
+    A stray gen-2 collection triggered by the returned match objects can
+    otherwise perturb sub-millisecond samples.
+    """
+    gc.collect()
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+@contextmanager
+def time_limit(seconds: float):
+    """Raise TimeoutError if the block runs for longer than `seconds`.
+
+    Guards against patterns that backtrack catastrophically; _sre checks
+    for signals while matching, so the alarm interrupts a runaway match.
+    Uses SIGALRM, so it is a no-op off POSIX or outside the main thread.
+    """
+    if (
+        not hasattr(signal, "setitimer")
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        yield
+        return
+
+    def _expired(signum, frame):
+        raise TimeoutError(f"exceeded the {seconds}s time limit")
+
+    previous = signal.signal(signal.SIGALRM, _expired)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def interpreter_label() -> str:
+    """Describe the running interpreter so result runs can be told apart."""
+    label = f"{platform.python_implementation()} {platform.python_version()}"
+    # sys._jit only exists on CPython builds that ship the experimental JIT
+    jit = getattr(sys, "_jit", None)
+    if jit is not None:
+        state = "enabled" if jit.is_enabled() else "disabled"
+        label += f" (JIT {state})"
+    return label
+
+
+def cpu_model() -> str:
+    """Best-effort CPU model name for the run header."""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def pin_process() -> str:
+    """Pin the process to a single CPU and raise its priority if allowed.
+
+    Scheduler migrations between cores (or between P- and E-cores on
+    hybrid CPUs) show up as large variance on sub-microsecond benchmarks.
+    Both steps are best-effort: affinity is Linux-only and a negative nice
+    value needs privileges. The BENCH_CPU environment variable selects the
+    core (e.g. one isolated with isolcpus); otherwise the lowest allowed
+    CPU is used. A BENCH_CPU that is not one allowed CPU number is ignored
+    with a warning. Returns a summary for the run header.
+    """
+    applied = []
+    if hasattr(os, "sched_setaffinity"):
+        allowed = os.sched_getaffinity(0)
+        requested = os.environ.get("BENCH_CPU")
+        cpu = min(allowed)
+        if requested is not None:
+            text = requested.strip()
+            cpu = int(text) if text.isdecimal() else None
+            if cpu not in allowed:
+                print(
+                    f"Warning: ignoring BENCH_CPU={requested!r}; expected one"
+                    f" CPU number out of {sorted(allowed)}"
+                )
+                cpu = None
+        if cpu is not None:
+            try:
+                os.sched_setaffinity(0, {cpu})
+                applied.append(f"pinned to CPU {cpu}")
+            except OSError as e:
+                print(f"Warning: could not pin to CPU {cpu}: {e}")
+    try:
+        os.nice(-10)
+        applied.append("nice -10")
+    except (AttributeError, OSError):
+        pass
+    return ", ".join(applied) or "not pinned"
+
+
+def spin_warmup(duration_ns: int = 500_000_000):
+    """Busy-loop so the CPU reaches a steady clock before the first sample.
+
+    Frequency governors ramp up under sustained load; without a warmup the
+    first benchmarks of a run are timed at a lower clock than the rest.
+    """
+    clock = time.perf_counter_ns
+    deadline = clock() + duration_ns
+    while clock() < deadline:
+        pass
+
+
+# ===-----------------------------------------------------------------------===#
+# Result Export
+# ===-----------------------------------------------------------------------===#
+
+
+def _ensure_parent_dir(filename: str):
+    """Create the directory holding `filename` if it does not exist yet."""
+    directory = os.path.dirname(filename)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory, exist_ok=True)
+
+
+def export_json(
+    filename: str,
+    engine: str,
+    results: dict,
+    extra_fields: Optional[dict] = None,
+):
+    """Export benchmark results to JSON file.
+
+    Args:
+        filename: Path to output JSON file
+        engine: Engine label read by compare_benchmarks.py
+        results: Mapping of benchmark name to a (time per iteration in ns,
+            total iterations) pair
+        extra_fields: Optional mapping of benchmark name to additional
+            fields stored alongside the timings
+    """
+    _ensure_parent_dir(filename)
+
+    json_results = {
+        "engine": engine,
+        "timestamp": datetime.now().isoformat(),
+        "results": {},
+    }
+
+    for name, (time_ns, iterations) in results.items():
+        json_results["results"][name] = {
+            "time_ns": time_ns,
+            "time_ms": time_ns / 1_000_000,
+            "iterations": iterations,
+        }
+        if extra_fields and name in extra_fields:
+            json_results["results"][name].update(extra_fields[name])
+
+    with open(filename, "wb") as f:
+        f.write(_dumps(json_results))
+
+    print(f"\nResults exported to {filename}")
+
+
+def export_csv(
+    filename: str,
+    results: dict,
+    extra_fields: Optional[dict] = None,
+):
+    """Export benchmark results to a CSV file, one row per benchmark.
+
+    Args:
+        filename: Path to output CSV file
+        results: Mapping of benchmark name to a (time per iteration in ns,
+            total iterations) pair
+        extra_fields: Optional mapping of benchmark name to additional
+            fields, each written as an extra column
+    """
+    _ensure_parent_dir(filename)
+
+    extra_fields = extra_fields or {}
+    # Union of the extra field names, in first-seen order
+    extra_columns = list(
+        dict.fromkeys(
+            key for fields in extra_fields.values() for key in fields
+        )
+    )
+
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            ["name", "time_ns", "time_ms", "iterations", *extra_columns]
+        )
+        for name, (time_ns, iterations) in results.items():
+            extra = extra_fields.get(name, {})
+            writer.writerow(
+                [
+                    name,
+                    time_ns,
+                    time_ns / 1_000_000,
+                    iterations,
+                    *(extra.get(column, "") for column in extra_columns),
+                ]
+            )
+
+    print(f"Results exported to {filename}")
@@ -3,12 +3,30 @@
 Python benchmark script for comparing regex performance with Python's re module.
 """
 
-import re
 import time
-import json
-import os
-import statistics
-from datetime import datetime
+from array import array
+from collections import deque
+from functools import lru_cache, wraps
+from itertools import repeat
+
+from bench_common import (
+    arg_has,
+    arg_value,
+    compile_regex,
+    cpu_model,
+    engine_name,
+    export_csv,
+    export_json,
+    find_median,
+    find_percentile,
+    gc_disabled,
+    interpreter_label,
+    load_engine,
+    pin_process,
+    repeat_to_length,
+    spin_warmup,
+    time_limit,
+)
 
 
 # ===-----------------------------------------------------------------------===#
@@ -21,20 +39,57 @@ MAX_ITERATIONS = 200_000
 WARMUP_ITERATIONS = 10
 # Minimum time per sample (1ms) to ensure OS jitter is a small fraction
 MIN_SAMPLE_NS = 1_000_000
+# Abort a benchmark (e.g. catastrophic backtracking) after this long; a
+# normal one finishes in about TARGET_RUNTIME_NS
+BENCHMARK_TIMEOUT_S = 10.0
 
 
-def _find_median(times: list[float]) -> float:
-    """Find median of a list of times."""
-    if not times:
-        return 0.0
-    return statistics.median(times)
+# ===-----------------------------------------------------------------------===#
+# CLI flags
+# ===-----------------------------------------------------------------------===#
+#
+# Supported:
+#   --bytes       Run on bytes patterns and texts instead of str
+#   --count-only  findall benchmarks walk matches via finditer without
+#                 building the result list
+#   --csv         Also write the results as CSV next to the JSON file
+#   --engine=<name>  Regex module to benchmark: re (default), re2
+#                    (google-re2) or regex (mrab-regex); the latter two
+#                    are optional dependencies
+#   --filter=<substr>  Only run benchmarks whose name contains <substr>;
+#                      results are not exported, so a partial run never
+#                      replaces the full results file
+#
+# Example: python3 benchmarks/python/bench_engine.py --bytes --filter=sub_
+
+
+@lru_cache(maxsize=None)
+def _encode(value: str) -> bytes:
+    """Encode an input once; the large texts are shared by many benchmarks."""
+    return value.encode("utf-8")
+
+
+def _prepare(*values: str):
+    """Encode benchmark inputs to bytes when --bytes is set.
+
+    Mojo strings are byte-oriented, so bytes mode keeps _sre on its 1-byte
+    path and gives ASCII-only \\d/\\w/\\s like the Mojo engine.
+    """
+    if not arg_has("--bytes"):
+        return values
+    return tuple(map(_encode, values))
 
 
-def _auto_calibrate(fn, iters: int) -> int:
+def _bench_skip(name: str) -> bool:
+    """True if --filter=<substr> is set and `name` does not contain it."""
+    f = arg_value("--filter=")
+    return bool(f) and f not in name
+
+
+def _auto_calibrate(batch, iters: int) -> int:
     """Auto-calibrate iterations so each sample takes >= MIN_SAMPLE_NS."""
     start = time.perf_counter_ns()
-    for _ in range(iters):
-        fn()
+    batch(iters)
     elapsed = time.perf_counter_ns() - start
     if elapsed < MIN_SAMPLE_NS and elapsed > 0:
         multiplier = int(MIN_SAMPLE_NS // elapsed) + 1
@@ -42,181 +97,176 @@ def _auto_calibrate(fn, iters: int) -> int:
     return iters
 
 
-# ===-----------------------------------------------------------------------===#
-# Direct Benchmark Functions (Mirroring Mojo Architecture)
-# ===-----------------------------------------------------------------------===#
-
-
-def benchmark_search(
-    name: str, pattern: str, text: str, internal_iterations: int
-):
-    """Benchmark search with pre-compiled regex and median timing."""
-
-    compiled_pattern = re.compile(pattern)
+def _run_samples(name: str, batch, internal_iterations: int):
+    """Time `batch` with median sampling, then print and store the result.
 
+    `batch(n)` runs the benchmarked call n times. Every benchmark_*
+    function shares this warmup, calibration and sampling loop, so they
+    differ only in the call being timed.
+    """
     # Warmup
-    for _ in range(WARMUP_ITERATIONS):
-        compiled_pattern.search(text)
+    batch(WARMUP_ITERATIONS)
 
     # Auto-calibrate: ensure each sample takes >= MIN_SAMPLE_NS
-    iters = _auto_calibrate(lambda: compiled_pattern.search(text), internal_iterations)
-
-    # Collect per-iteration times
-    times = []
+    iters = _auto_calibrate(batch, internal_iterations)
+
+    # Collect raw sample durations in an int64 buffer and scale them to
+    # per-iteration times once afterwards. The clock and append are bound
+    # as locals to keep global/attribute lookups out of the sampling loop.
+    samples = array("q")
+    record = samples.append
+    clock = time.perf_counter_ns
     total_time = 0
     actual_iterations = 0
 
-    while total_time < TARGET_RUNTIME_NS and actual_iterations < MAX_ITERATIONS:
-        start_time = time.perf_counter_ns()
+    with gc_disabled():
+        while (
+            total_time < TARGET_RUNTIME_NS
+            and actual_iterations < MAX_ITERATIONS
+        ):
+            start_time = clock()
+            batch(iters)
+            end_time = clock()
+            elapsed = end_time - start_time
+            total_time += elapsed
+            actual_iterations += 1
+            record(elapsed)
+
+    ordered = sorted(samples)
+    median_ms = find_median(ordered) / iters / 1_000_000.0
+    p95_ms = find_percentile(ordered, 0.95) / iters / 1_000_000.0
+    total_matches = actual_iterations * iters
 
-        for _ in range(iters):
-            result = compiled_pattern.search(text)
-            if not result:
-                print(
-                    f"ERROR: No search match in {name} for pattern: {pattern}"
-                )
-                return
+    print(f"| {name:<25} | {median_ms:>21.17f} | {total_matches:>6} |")
 
-        end_time = time.perf_counter_ns()
-        elapsed = end_time - start_time
-        total_time += elapsed
-        actual_iterations += 1
-        times.append(elapsed / iters / 1_000_000.0)
+    _store_benchmark_result(name, median_ms, total_matches, p95_ms)
 
-    median_ms = _find_median(times)
-    total_matches = actual_iterations * iters
 
-    padded_name = name + " " * (25 - len(name))
-    print(f"| {padded_name} | {median_ms:>21.17f} | {total_matches:>6} |")
-
-    _store_benchmark_result(name, median_ms, total_matches)
+def _with_timeout(benchmark):
+    """Report a benchmark as timed out instead of letting it stall the run.
 
+    Compilation, validation and timing all run under the limit, since a
+    pathological pattern can hang in any of them.
+    """
 
-def benchmark_match_first(
-    name: str, pattern: str, text: str, internal_iterations: int
-):
-    """Benchmark match_first with pre-compiled regex and median timing."""
+    @wraps(benchmark)
+    def guarded(name: str, *args):
+        try:
+            with time_limit(BENCHMARK_TIMEOUT_S):
+                benchmark(name, *args)
+        except TimeoutError:
+            print(f"| {name:<25} | {'TIMED OUT':>21} | {0:>6} |")
+            _store_timeout(name)
 
-    compiled_pattern = re.compile(pattern)
+    return guarded
 
-    # Warmup
-    for _ in range(WARMUP_ITERATIONS):
-        compiled_pattern.match(text)
 
-    # Auto-calibrate: ensure each sample takes >= MIN_SAMPLE_NS
-    iters = _auto_calibrate(lambda: compiled_pattern.match(text), internal_iterations)
+# ===-----------------------------------------------------------------------===#
+# Direct Benchmark Functions (Mirroring Mojo Architecture)
+# ===-----------------------------------------------------------------------===#
+#
+# Each function binds the compiled pattern's method once, so the timed loop
+# skips the attribute lookup. The batches iterate and drop results in C via
+# deque(map(...), maxlen=0) rather than in a Python loop. A benchmark whose
+# result must be a match checks it once before timing, since every call
+# returns the same result.
 
-    # Collect per-iteration times
-    times = []
-    total_time = 0
-    actual_iterations = 0
 
-    while total_time < TARGET_RUNTIME_NS and actual_iterations < MAX_ITERATIONS:
-        start_time = time.perf_counter_ns()
+@_with_timeout
+def benchmark_search(
+    name: str, pattern: str, text: str, internal_iterations: int
+):
+    """Benchmark search with pre-compiled regex and median timing."""
 
-        for _ in range(iters):
-            result = compiled_pattern.match(text)
-            if not result:
-                print(f"ERROR: No match in {name} for pattern: {pattern}")
-                return
+    if _bench_skip(name):
+        return
 
-        end_time = time.perf_counter_ns()
-        elapsed = end_time - start_time
-        total_time += elapsed
-        actual_iterations += 1
-        times.append(elapsed / iters / 1_000_000.0)
+    pattern, text = _prepare(pattern, text)
+    compiled_pattern = compile_regex(pattern)
+    search = compiled_pattern.search
 
-    median_ms = _find_median(times)
-    total_matches = actual_iterations * iters
+    if not search(text):
+        print(f"ERROR: No search match in {name} for pattern: {pattern}")
+        return
 
-    padded_name = name + " " * (25 - len(name))
-    print(f"| {padded_name} | {median_ms:>21.17f} | {total_matches:>6} |")
+    def batch(n):
+        deque(map(search, repeat(text, n)), maxlen=0)
 
-    _store_benchmark_result(name, median_ms, total_matches)
+    _run_samples(name, batch, internal_iterations)
 
 
-def benchmark_findall(
+@_with_timeout
+def benchmark_match_first(
     name: str, pattern: str, text: str, internal_iterations: int
 ):
-    """Benchmark findall with pre-compiled regex and median timing."""
+    """Benchmark match_first with pre-compiled regex and median timing."""
 
-    compiled_pattern = re.compile(pattern)
+    if _bench_skip(name):
+        return
 
-    # Warmup
-    for _ in range(WARMUP_ITERATIONS):
-        compiled_pattern.findall(text)
+    pattern, text = _prepare(pattern, text)
+    compiled_pattern = compile_regex(pattern)
+    match = compiled_pattern.match
 
-    # Auto-calibrate: ensure each sample takes >= MIN_SAMPLE_NS
-    iters = _auto_calibrate(lambda: compiled_pattern.findall(text), internal_iterations)
+    if not match(text):
+        print(f"ERROR: No match in {name} for pattern: {pattern}")
+        return
 
-    # Collect per-iteration times
-    times = []
-    total_time = 0
-    actual_iterations = 0
+    def batch(n):
+        deque(map(match, repeat(text, n)), maxlen=0)
 
-    while total_time < TARGET_RUNTIME_NS and actual_iterations < MAX_ITERATIONS:
-        start_time = time.perf_counter_ns()
+    _run_samples(name, batch, internal_iterations)
 
-        for _ in range(iters):
-            compiled_pattern.findall(text)
 
-        end_time = time.perf_counter_ns()
-        elapsed = end_time - start_time
-        total_time += elapsed
-        actual_iterations += 1
-        times.append(elapsed / iters / 1_000_000.0)
+@_with_timeout
+def benchmark_findall(
+    name: str, pattern: str, text: str, internal_iterations: int
+):
+    """Benchmark findall with pre-compiled regex and median timing."""
 
-    median_ms = _find_median(times)
-    total_matches = actual_iterations * iters
+    if _bench_skip(name):
+        return
+
+    pattern, text = _prepare(pattern, text)
+    compiled_pattern = compile_regex(pattern)
+    findall = compiled_pattern.findall
+    if arg_has("--count-only"):
+        # Walk the matches without materializing the list of strings
+        finditer = compiled_pattern.finditer
 
-    padded_name = name + " " * (25 - len(name))
-    print(f"| {padded_name} | {median_ms:>21.17f} | {total_matches:>6} |")
+        def findall(text):
+            deque(finditer(text), maxlen=0)
 
-    _store_benchmark_result(name, median_ms, total_matches)
+    def batch(n):
+        deque(map(findall, repeat(text, n)), maxlen=0)
 
+    _run_samples(name, batch, internal_iterations)
 
+
+@_with_timeout
 def benchmark_is_match(
     name: str, pattern: str, text: str, internal_iterations: int
 ):
     """Benchmark bool-only match check with pre-compiled regex and median timing.
-    Uses re.match which returns a match object, then checks truthiness (like is_match).
+    Uses re.match which returns a match object, then compares it against None
+    (like is_match); an identity test avoids the call into bool().
     """
 
-    compiled_pattern = re.compile(pattern)
+    if _bench_skip(name):
+        return
 
-    # Warmup
-    for _ in range(WARMUP_ITERATIONS):
-        bool(compiled_pattern.match(text))
+    pattern, text = _prepare(pattern, text)
+    compiled_pattern = compile_regex(pattern)
+    match = compiled_pattern.match
 
-    # Auto-calibrate
-    iters = _auto_calibrate(lambda: bool(compiled_pattern.match(text)), internal_iterations)
+    def batch(n):
+        for _ in repeat(None, n):
+            match(text) is not None
 
-    # Collect per-iteration times
-    times = []
-    total_time = 0
-    actual_iterations = 0
-
-    while total_time < TARGET_RUNTIME_NS and actual_iterations < MAX_ITERATIONS:
-        start_time = time.perf_counter_ns()
-
-        for _ in range(iters):
-            bool(compiled_pattern.match(text))
-
-        end_time = time.perf_counter_ns()
-        elapsed = end_time - start_time
-        total_time += elapsed
-        actual_iterations += 1
-        times.append(elapsed / iters / 1_000_000.0)
-
-    median_ms = _find_median(times)
-    total_matches = actual_iterations * iters
-
-    padded_name = name + " " * (25 - len(name))
-    print(f"| {padded_name} | {median_ms:>21.17f} | {total_matches:>6} |")
-
-    _store_benchmark_result(name, median_ms, total_matches)
+    _run_samples(name, batch, internal_iterations)
 
 
+@_with_timeout
 def benchmark_sub(
     name: str,
     pattern: str,
@@ -226,80 +276,69 @@ def benchmark_sub(
 ):
     """Benchmark re.sub with pre-compiled regex and median timing."""
 
-    compiled_pattern = re.compile(pattern)
+    if _bench_skip(name):
+        return
 
-    # Warmup
-    for _ in range(WARMUP_ITERATIONS):
-        compiled_pattern.sub(repl, text)
+    pattern, repl, text = _prepare(pattern, repl, text)
+    compiled_pattern = compile_regex(pattern)
+    sub = compiled_pattern.sub
 
-    # Auto-calibrate
-    iters = _auto_calibrate(
-        lambda: compiled_pattern.sub(repl, text), internal_iterations
-    )
-
-    # Collect per-iteration times
-    times = []
-    total_time = 0
-    actual_iterations = 0
-
-    while total_time < TARGET_RUNTIME_NS and actual_iterations < MAX_ITERATIONS:
-        start_time = time.perf_counter_ns()
-
-        for _ in range(iters):
-            compiled_pattern.sub(repl, text)
-
-        end_time = time.perf_counter_ns()
-        elapsed = end_time - start_time
-        total_time += elapsed
-        actual_iterations += 1
-        times.append(elapsed / iters / 1_000_000.0)
-
-    median_ms = _find_median(times)
-    total_matches = actual_iterations * iters
-
-    padded_name = name + " " * (25 - len(name))
-    print(f"| {padded_name} | {median_ms:>21.17f} | {total_matches:>6} |")
+    def batch(n):
+        deque(map(sub, repeat(repl, n), repeat(text, n)), maxlen=0)
 
-    _store_benchmark_result(name, median_ms, total_matches)
+    _run_samples(name, batch, internal_iterations)
 
 
 # ===-----------------------------------------------------------------------===#
 # Result Collection for JSON Export
 # ===-----------------------------------------------------------------------===#
 
+# Benchmark name -> (time per iteration in ns, total iterations)
 _benchmark_results = {}
-_benchmark_iterations = {}
+# Benchmark name -> extra JSON fields (95th percentile per-iteration time,
+# or a timed_out marker)
+_benchmark_extra = {}
 
 
-def _store_benchmark_result(name: str, time_ms: float, total_iterations: int):
+def _store_benchmark_result(
+    name: str, time_ms: float, total_iterations: int, p95_ms: float
+):
     """Store benchmark result for JSON export."""
-    _benchmark_results[name] = time_ms * 1_000_000  # Convert to nanoseconds
-    _benchmark_iterations[name] = total_iterations
+    # Convert to nanoseconds
+    _benchmark_results[name] = (time_ms * 1_000_000, total_iterations)
+    _benchmark_extra[name] = {"p95_ns": p95_ms * 1_000_000}
 
 
-def export_json_results(
-    filename: str = "benchmarks/results/python_results.json",
-):
-    """Export collected benchmark results to JSON file."""
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
+def _store_timeout(name: str):
+    """Record a benchmark that hit BENCHMARK_TIMEOUT_S.
 
-    json_results = {
-        "engine": "python",
-        "timestamp": datetime.now().isoformat(),
-        "results": {},
-    }
+    compare_benchmarks.py skips entries marked timed_out.
+    """
+    _benchmark_results[name] = (0.0, 0)
+    _benchmark_extra[name] = {"timed_out": True}
 
-    for name in _benchmark_results:
-        json_results["results"][name] = {
-            "time_ns": _benchmark_results[name],
-            "time_ms": _benchmark_results[name] / 1_000_000,
-            "iterations": _benchmark_iterations[name],
-        }
 
-    with open(filename, "w") as f:
-        json.dump(json_results, f, indent=2)
+def export_json_results(filename: str = ""):
+    """Export collected benchmark results to JSON file.
 
-    print(f"\nResults exported to {filename}")
+    Results from an alternative --engine are labelled and written
+    separately (e.g. python_re2_results.json) so they never overwrite the
+    python_results.json baseline used by the comparison scripts.
+    """
+    engine = "python"
+    if engine_name() != "re":
+        engine = f"python_{engine_name()}"
+    if not filename:
+        filename = f"benchmarks/results/{engine}_results.json"
+    export_json(
+        filename, engine, _benchmark_results, extra_fields=_benchmark_extra
+    )
+    if arg_has("--csv"):
+        export_csv(
+            filename.removesuffix(".json") + ".csv",
+            _benchmark_results,
+            extra_fields=_benchmark_extra,
+        )
 
 
 # ===-----------------------------------------------------------------------===#
@@ -307,21 +346,19 @@ def export_json_results(
 # ===-----------------------------------------------------------------------===
 
 
+@lru_cache(maxsize=32)
 def make_test_string(
     length: int, pattern: str = "abcdefghijklmnopqrstuvwxyz"
 ) -> str:
-    """Generate a test string of specified length by repeating a pattern."""
-    if length <= 0:
-        return ""
-
-    pattern_len = len(pattern)
-    full_repeats = length // pattern_len
-    remainder = length % pattern_len
+    """Generate a test string of specified length by repeating a pattern.
 
-    result = pattern * full_repeats + pattern[:remainder]
-    return result
+    Memoized: strings are immutable and the same lengths are requested
+    several times while preparing test data.
+    """
+    return repeat_to_length(pattern, length)
 
 
+@lru_cache(maxsize=None)
 def make_phone_test_data(num_phones: int) -> str:
     """Generate test data containing US phone numbers in various formats."""
     phone_patterns = [
@@ -337,16 +374,14 @@ def make_phone_test_data(num_phones: int) -> str:
     filler_text = " Contact us at "
     extra_text = " or email support@company.com for assistance. "
 
-    result = ""
-    for i in range(num_phones):
-        result += filler_text
-        pattern_idx = i % len(phone_patterns)
-        result += phone_patterns[pattern_idx]
-        result += extra_text
-
-    return result
+    num_patterns = len(phone_patterns)
+    return "".join(
+        filler_text + phone_patterns[i % num_patterns] + extra_text
+        for i in range(num_phones)
+    )
 
 
+@lru_cache(maxsize=None)
 def make_complex_pattern_test_data(num_entries: int) -> str:
     """Generate test data for US national phone number validation."""
     complex_patterns = [
@@ -364,14 +399,11 @@ def make_complex_pattern_test_data(num_entries: int) -> str:
     filler_text = " ID: "
     extra_text = " Status: ACTIVE "
 
-    result = ""
-    for i in range(num_entries):
-        result += filler_text
-        pattern_idx = i % len(complex_patterns)
-        result += complex_patterns[pattern_idx]
-        result += extra_text
-
-    return result
+    num_patterns = len(complex_patterns)
+    return "".join(
+        filler_text + complex_patterns[i % num_patterns] + extra_text
+        for i in range(num_entries)
+    )
 
 
 # ===-----------------------------------------------------------------------===#
@@ -385,6 +417,19 @@ def main():
     print(
         "Target runtime: 500ms per benchmark, reporting median iteration time"
     )
+    print(f"Interpreter: {interpreter_label()}")
+    pinning = pin_process()
+    spin_warmup()
+    print(f"CPU: {cpu_model()} ({pinning})")
+    load_engine(engine_name())
+    if engine_name() != "re":
+        print(f"Engine: {engine_name()}")
+    if arg_has("--bytes"):
+        print("Bytes mode: patterns and texts are encoded to bytes")
+    if arg_has("--count-only"):
+        print("Count-only mode: findall benchmarks do not build result lists")
+    if arg_value("--filter="):
+        print(f"Filter: {arg_value('--filter=')} (results are not exported)")
     print()
 
     # Prepare test data - same as Mojo benchmarks
@@ -430,7 +475,10 @@ def main():
 
     # ===== Anchor Benchmarks =====
     benchmark_match_first("anchor_start", "^abc", text_10000, 2000)
-    benchmark_match_first("anchor_end", "xyz$", text_10000, 2000)
+    # text_10000 ends in "hello world", so give the end anchor a text that
+    # actually ends in "xyz" and search for it (match_first is start-anchored)
+    text_anchor_end = make_test_string(10000) + "xyz"
+    benchmark_search("anchor_end", "xyz$", text_anchor_end, 2000)
 
     # ===== Alternation Benchmarks =====
     benchmark_match_first("alternation_simple", "a|b|c", text_10000, 1000)
@@ -757,7 +805,7 @@ def main():
         "sub_limited_count",
         "hello",
         "HI",
-        short_text * 100,
+        medium_text,
         100,
     )
     # Group-reference substitution
@@ -786,9 +834,9 @@ def main():
 
     # ===== Sparse Match Benchmarks (long text, rare matches) =====
     filler = "The quick brown fox jumps over the lazy dog. " * 40
-    sparse_phone_text = ""
-    for _ in range(20):
-        sparse_phone_text += filler + "Call 555-123-4567 now. "
+    sparse_phone_text = (filler + "Call 555-123-4567 now. ") * 20
+    # ~90KB of filler on either side of the single match
+    filler_block = filler * 50
 
     benchmark_findall(
         "sparse_phone_findall",
@@ -799,7 +847,7 @@ def main():
     benchmark_search(
         "sparse_phone_search",
         r"\(\d{3}\)\s\d{3}-\d{4}",
-        filler * 50 + "(555) 123-4567" + filler * 50,
+        filler_block + "(555) 123-4567" + filler_block,
         5,
     )
     benchmark_findall(
@@ -808,9 +856,7 @@ def main():
         (filler + "Contact admin@example.com for details. ") * 10,
         5,
     )
-    sparse_flex_text = ""
-    for _ in range(10):
-        sparse_flex_text += filler + "Reach us at (555) 123-4567 today. "
+    sparse_flex_text = (filler + "Reach us at (555) 123-4567 today. ") * 10
     benchmark_findall(
         "sparse_flex_phone_findall",
         r"\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}",
@@ -826,7 +872,8 @@ def main():
     benchmark_match_first("nanpa_match_first", NANPA_PATTERN, "6502530000", 500)
 
     print()
-    export_json_results()
+    if not arg_value("--filter="):
+        export_json_results()
 
 
 if __name__ == "__main__":
@@ -7,12 +7,44 @@ This benchmark provides equivalent Python regex patterns to compare against
 the Mojo NFA engine's SIMD optimizations.
 """
 
-import re
-import time
-import json
-import os
-from datetime import datetime
-from typing import Callable, List
+import gc
+import sys
+import timeit
+from collections import deque
+from functools import lru_cache, partial
+from typing import Callable
+
+from bench_common import (
+    arg_has,
+    compile_regex,
+    cpu_model,
+    engine_name,
+    export_csv,
+    export_json,
+    find_median,
+    find_percentile,
+    interpreter_label,
+    load_engine,
+    pin_process,
+    repeat_to_length,
+    spin_warmup,
+    time_limit,
+)
+
+
+# ===-----------------------------------------------------------------------===#
+# CLI flags
+# ===-----------------------------------------------------------------------===#
+#
+# Supported:
+#   --bytes       Run on bytes patterns and texts instead of str
+#   --count-only  Walk matches via finditer without building the findall
+#                 result list
+#   --csv         Also write the results as CSV next to the JSON file
+#   --engine=<name>  Regex module to benchmark: re (default), re2
+#                    (google-re2) or regex (mrab-regex); see bench_engine.py
+#
+# Example: python3 benchmarks/python/simd_focused_benchmark.py --count-only
 
 
 # ===-----------------------------------------------------------------------===#
@@ -20,91 +52,195 @@ from typing import Callable, List
 # ===-----------------------------------------------------------------------===#
 
 
+# Each timed call performs one regex operation. simd_focused_benchmark.mojo
+# repeats the operation 20 times per call to amortize its call overhead;
+# here timeit's autorange already sizes the runs and the call overhead is
+# subtracted, so reported times are per operation without an inner loop.
+# Abort a benchmark that runs longer than this (a normal one takes ~1.5s)
+BENCHMARK_TIMEOUT_S = 10.0
+
+
+def _iqr(values: list) -> float:
+    """Interquartile range of already sorted `values`, 0.0 with fewer than two.
+
+    Nearest-rank quartiles, as bench_engine.py's p95; with the default five
+    repetitions they are exactly the second and fourth run.
+    """
+    if len(values) < 2:
+        return 0.0
+    return find_percentile(values, 0.75) - find_percentile(values, 0.25)
+
+
 class Benchmark:
     """Simple benchmark infrastructure to mirror Mojo's benchmark system."""
 
-    def __init__(self, num_repetitions: int = 3):
+    def __init__(self, num_repetitions: int = 5):
         self.num_repetitions = num_repetitions
         self.results = {}
+        self.spread = {}
+        self.timed_out = set()
         self.iterations = {}
+        self.bytes_processed = {}
+        self._call_overhead_ns = None
+
+    def call_overhead_ns(self) -> float:
+        """Per-call cost of the timing loop and dispatch around an operation.
+
+        Each benchmark body is partial(findall, text), so the calibration
+        times the same path with a constant-time C call, partial(len, ""),
+        in place of findall. Calibrated once (best of 5 runs) and subtracted
+        from every result so the reported time reflects the regex operation.
+        Under --count-only findall is a Python function, and its frame is
+        counted as part of the operation.
+        """
+        if self._call_overhead_ns is None:
+            calls = 100_000
+            noop = partial(len, "")
+            samples = timeit.Timer(noop).repeat(repeat=5, number=calls)
+            self._call_overhead_ns = min(samples) / calls * 1e9
+        return self._call_overhead_ns
 
     def bench_function(
-        self, name: str, fn: Callable[[], None], warmup_iterations: int = 3
+        self,
+        name: str,
+        fn: Callable[[], None],
+        warmup_iterations: int = 20,
+        bytes_processed: int = 0,
     ):
-        """Benchmark a function with warmup and multiple repetitions."""
-        # Warmup silently
-        for _ in range(warmup_iterations):
-            fn()
-
-        # Determine target runtime and calculate iterations
-        target_runtime = 100_000_000  # 100ms target
+        """Benchmark a function with warmup and multiple repetitions.
 
-        # Run the actual benchmark
-        total_time = 0
-        actual_iterations = 0
+        Args:
+            name: Benchmark name, matching the Mojo benchmark
+            fn: Benchmark body, performing one operation per call
+            warmup_iterations: Untimed calls before measuring
+            bytes_processed: Text bytes scanned per operation, used
+                to report throughput (0 if not applicable)
+        """
+        self.bytes_processed[name] = bytes_processed
+        try:
+            with time_limit(BENCHMARK_TIMEOUT_S):
+                number, samples = self._time_runs(fn, warmup_iterations)
+        except TimeoutError:
+            self.timed_out.add(name)
+            self.results[name] = 0.0
+            self.spread[name] = 0.0
+            self.iterations[name] = 0
+            return
+
+        # Per-operation time of each run, net of the loop and call overhead
+        overhead_ns = self.call_overhead_ns()
+        op_ns = sorted(
+            max(0.0, sample / number * 1e9 - overhead_ns) for sample in samples
+        )
 
-        while total_time < target_runtime and actual_iterations < 100_000:
-            start_time = time.perf_counter_ns()
+        # Store results
+        self.results[name] = find_median(op_ns)
+        self.spread[name] = _iqr(op_ns)
+        self.iterations[name] = number * self.num_repetitions
+
+    def _time_runs(self, fn: Callable[[], None], warmup_iterations: int):
+        """Warm up `fn`, then return (calls per run, seconds of each run)."""
+        # Warmup silently. Enough calls for the specializing interpreter (and
+        # the experimental JIT, when enabled) to settle on the hot paths.
+        for _ in range(warmup_iterations):
             fn()
-            end_time = time.perf_counter_ns()
-            fn_time = end_time - start_time
-            total_time += fn_time
-            actual_iterations += 1
 
-        # Calculate mean time per run
-        mean_time = total_time / actual_iterations
-
-        # All SIMD benchmarks have 20 internal iterations
-        internal_iterations = 20
-
-        # Store results
-        self.results[name] = mean_time / internal_iterations
-        self.iterations[name] = actual_iterations * internal_iterations
+        # timeit disables the GC while timing; collect first so garbage left
+        # by warmup and earlier benchmarks is not carried into the runs
+        gc.collect()
+
+        # timeit picks the call count (autorange grows it until one run
+        # takes >= 0.2s), disables GC while timing and keeps the clock reads
+        # out of the per-call path. The median of num_repetitions runs is
+        # reported along with their interquartile range.
+        timer = timeit.Timer(fn)
+        number, _ = timer.autorange()
+        samples = timer.repeat(repeat=self.num_repetitions, number=number)
+        return number, samples
+
+    def throughput_mbps(self, name: str) -> float:
+        """Scanned text throughput in MB/s, or 0.0 if bytes are unknown."""
+        time_ns = self.results[name]
+        if not self.bytes_processed[name] or time_ns <= 0:
+            return 0.0
+        # bytes/ns * 1e9 = bytes/s, / 1e6 = MB/s
+        return self.bytes_processed[name] * 1_000 / time_ns
 
     def dump_report(self):
         """Print summary report of all benchmarks in Mojo format."""
-        print("\n=== Benchmark Results ===")
-        print("| name                      | met (ms)              | iters  |")
-        print("|---------------------------|-----------------------|--------|")
+        rows = [
+            "\n=== Benchmark Results ===",
+            "| name                      | met (ms)              | iters  |"
+            " MB/s     | IQR (ms)     |",
+            "|---------------------------|-----------------------|--------|"
+            "----------|--------------|",
+        ]
 
         for name in self.results:
+            if name in self.timed_out:
+                rows.append(
+                    f"| {name:<25} | {'TIMED OUT':>21} | {0:>6} |"
+                    f" {'':>8} | {'':>12} |"
+                )
+                continue
+
             # Format time in milliseconds with proper precision
             time_ms = self.results[name] / 1_000_000
             iters = self.iterations[name]
+            mbps = self.throughput_mbps(name)
+            iqr_ms = self.spread[name] / 1_000_000
 
             # Right-align values to match Mojo format
-            print(f"| {name:<25} | {time_ms:>21.17f} | {iters:>6} |")
+            rows.append(
+                f"| {name:<25} | {time_ms:>21.17f} | {iters:>6} |"
+                f" {mbps:>8.1f} | {iqr_ms:>12.9f} |"
+            )
+
+        # Emit the whole table in one write instead of one per row
+        sys.stdout.write("\n".join(rows) + "\n")
 
     def export_json(
-        self, filename: str = "benchmarks/results/python_simd_results.json"
+        self,
+        filename: str = "benchmarks/results/python_simd_results.json",
+        engine: str = "python_simd",
     ):
         """Export benchmark results to JSON file.
 
         Args:
             filename: Path to output JSON file
+            engine: Engine label read by compare_benchmarks.py
         """
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-
-        # Convert results to JSON-serializable format
-        json_results = {
-            "engine": "python_simd",
-            "timestamp": datetime.now().isoformat(),
-            "results": {},
-        }
-
-        for name in self.results:
-            json_results["results"][name] = {
-                "time_ns": self.results[name],
-                "time_ms": self.results[name] / 1_000_000,
-                "iterations": self.iterations[name],
-            }
+        results, extra = self._export_rows()
+        export_json(filename, engine, results, extra_fields=extra)
 
-        # Write to file
-        with open(filename, "w") as f:
-            json.dump(json_results, f, indent=2)
+    def export_csv(
+        self, filename: str = "benchmarks/results/python_simd_results.csv"
+    ):
+        """Export benchmark results to CSV file.
 
-        print(f"\nResults exported to {filename}")
+        Args:
+            filename: Path to output CSV file
+        """
+        results, extra = self._export_rows()
+        export_csv(filename, results, extra_fields=extra)
+
+    def _export_rows(self) -> tuple:
+        """Results and per-benchmark extra fields in the export layout."""
+        results = {
+            name: (time_ns, self.iterations[name])
+            for name, time_ns in self.results.items()
+        }
+        extra = {
+            name: {
+                "mb_per_s": self.throughput_mbps(name),
+                "iqr_ns": self.spread[name],
+            }
+            for name in self.results
+        }
+        # compare_benchmarks.py skips entries marked timed_out
+        for name in self.timed_out:
+            extra[name] = {"timed_out": True}
+        return results, extra
 
 
 # ===-----------------------------------------------------------------------===#
@@ -112,6 +248,7 @@ class Benchmark:
 # ===-----------------------------------------------------------------------===#
 
 
+@lru_cache(maxsize=None)
 def make_digit_heavy_text(length: int) -> str:
     """Generate text with heavy digit content for digit matching.
 
@@ -121,23 +258,11 @@ def make_digit_heavy_text(length: int) -> str:
     Returns:
         String with lots of digits interspersed with non-digits.
     """
-    if length <= 0:
-        return ""
-
     base_pattern = "abc123def456ghi789jkl012mno345pqr678stu901vwx234yz567"
-    pattern_len = len(base_pattern)
-    full_repeats = length // pattern_len
-    remainder = length % pattern_len
-
-    # Add full pattern repeats
-    result = base_pattern * full_repeats
-
-    # Add partial pattern for remainder
-    result += base_pattern[:remainder]
-
-    return result
+    return repeat_to_length(base_pattern, length)
 
 
+@lru_cache(maxsize=None)
 def make_space_heavy_text(length: int) -> str:
     """Generate text with heavy whitespace content for whitespace matching.
 
@@ -147,23 +272,11 @@ def make_space_heavy_text(length: int) -> str:
     Returns:
         String with lots of whitespace interspersed with other characters.
     """
-    if length <= 0:
-        return ""
-
     base_pattern = "word1 \t word2\n\rword3   word4\t\t\nword5 word6"
-    pattern_len = len(base_pattern)
-    full_repeats = length // pattern_len
-    remainder = length % pattern_len
-
-    # Add full pattern repeats
-    result = base_pattern * full_repeats
-
-    # Add partial pattern for remainder
-    result += base_pattern[:remainder]
-
-    return result
+    return repeat_to_length(base_pattern, length)
 
 
+@lru_cache(maxsize=None)
 def make_range_heavy_text(length: int) -> str:
     """Generate text with heavy character range content for range matching.
 
@@ -173,21 +286,8 @@ def make_range_heavy_text(length: int) -> str:
     Returns:
         String with lots of alphanumeric characters interspersed with others.
     """
-    if length <= 0:
-        return ""
-
     base_pattern = "abc123XYZ!@#def456GHI$%^jkl789MNO&*()pqr012STU+={}wxy345VWZ"
-    pattern_len = len(base_pattern)
-    full_repeats = length // pattern_len
-    remainder = length % pattern_len
-
-    # Add full pattern repeats
-    result = base_pattern * full_repeats
-
-    # Add partial pattern for remainder
-    result += base_pattern[:remainder]
-
-    return result
+    return repeat_to_length(base_pattern, length)
 
 
 # ===-----------------------------------------------------------------------===#
@@ -195,69 +295,63 @@ def make_range_heavy_text(length: int) -> str:
 # ===-----------------------------------------------------------------------===#
 
 
-def bench_python_simd_digits(test_text: str) -> Callable[[], None]:
-    """Benchmark Python regex with digit matching."""
-    pattern = re.compile(r"\d+")
+def _findall(pattern) -> Callable:
+    """Return pattern.findall, or a finditer drain under --count-only.
 
-    def benchmark_fn():
-        for _ in range(20):
-            result = pattern.findall(test_text)
-            # Keep result to prevent optimization
-            len(result)
+    `pattern` is a compiled pattern from any --engine module; only its
+    findall and finditer methods are used.
 
-    return benchmark_fn
+    The Mojo benchmarks build a match list (match_all), so findall is the
+    default; counting only measures the scan without list allocation.
+    """
+    if not arg_has("--count-only"):
+        return pattern.findall
+    finditer = pattern.finditer
 
+    def count_only(text):
+        deque(finditer(text), maxlen=0)
 
-def bench_python_simd_whitespace(test_text: str) -> Callable[[], None]:
-    """Benchmark Python regex with whitespace matching."""
-    pattern = re.compile(r"\s+")
+    return count_only
 
-    def benchmark_fn():
-        for _ in range(20):
-            result = pattern.findall(test_text)
-            # Keep result to prevent optimization
-            len(result)
 
-    return benchmark_fn
+def compile_pattern(pattern: str):
+    """Compile a pattern with the --engine module, as bytes under --bytes.
 
+    The 10k and 50k benchmarks share the compiled object.
+    """
+    if arg_has("--bytes"):
+        pattern = pattern.encode("ascii")
+    return compile_regex(pattern)
 
-def bench_python_simd_range(test_text: str) -> Callable[[], None]:
-    """Benchmark Python regex with character range matching."""
-    pattern = re.compile(r"[a-zA-Z0-9]+")
 
-    def benchmark_fn():
-        for _ in range(20):
-            result = pattern.findall(test_text)
-            # Keep result to prevent optimization
-            len(result)
+def bench_python_simd_digits(test_text: str) -> Callable[[], None]:
+    """Benchmark Python regex with digit matching."""
+    findall = _findall(compile_pattern(r"\d+"))
+    return partial(findall, test_text)
 
-    return benchmark_fn
 
+def bench_python_simd_whitespace(test_text: str) -> Callable[[], None]:
+    """Benchmark Python regex with whitespace matching."""
+    findall = _findall(compile_pattern(r"\s+"))
+    return partial(findall, test_text)
 
-def bench_python_simd_negated_range(test_text: str) -> Callable[[], None]:
-    """Benchmark Python regex with negated character range matching."""
-    pattern = re.compile(r"[^a-zA-Z0-9]+")
 
-    def benchmark_fn():
-        for _ in range(20):
-            result = pattern.findall(test_text)
-            # Keep result to prevent optimization
-            len(result)
+def bench_python_simd_range(test_text: str) -> Callable[[], None]:
+    """Benchmark Python regex with character range matching."""
+    findall = _findall(compile_pattern(r"[a-zA-Z0-9]+"))
+    return partial(findall, test_text)
 
-    return benchmark_fn
+
+def bench_python_simd_negated_range(test_text: str) -> Callable[[], None]:
+    """Benchmark Python regex with negated character range matching."""
+    findall = _findall(compile_pattern(r"[^a-zA-Z0-9]+"))
+    return partial(findall, test_text)
 
 
 def bench_python_simd_quantified_range(test_text: str) -> Callable[[], None]:
     """Benchmark Python regex with quantified character range matching."""
-    pattern = re.compile(r"[a-z]{3,10}")
-
-    def benchmark_fn():
-        for _ in range(20):
-            result = pattern.findall(test_text)
-            # Keep result to prevent optimization
-            len(result)
-
-    return benchmark_fn
+    findall = _findall(compile_pattern(r"[a-z]{3,10}"))
+    return partial(findall, test_text)
 
 
 # ===-----------------------------------------------------------------------===#
@@ -267,13 +361,24 @@ def bench_python_simd_quantified_range(test_text: str) -> Callable[[], None]:
 
 def main():
     """Run all benchmarks and display results."""
-    m = Benchmark(num_repetitions=3)
+    m = Benchmark(num_repetitions=5)
 
     print("=== SIMD-Focused Python Regex Benchmarks ===")
     print(
         "These benchmarks provide Python baselines for comparison with Mojo NFA"
         " engine SIMD optimizations."
     )
+    print(f"Interpreter: {interpreter_label()}")
+    pinning = pin_process()
+    spin_warmup()
+    print(f"CPU: {cpu_model()} ({pinning})")
+    load_engine(engine_name())
+    if engine_name() != "re":
+        print(f"Engine: {engine_name()}")
+    if arg_has("--bytes"):
+        print("Bytes mode: patterns and texts are encoded to bytes")
+    if arg_has("--count-only"):
+        print("Count-only mode: matches are not collected into lists")
     print("")
 
     # Pre-create test strings to avoid measurement overhead
@@ -284,27 +389,52 @@ def main():
     range_text_10k = make_range_heavy_text(10000)
     range_text_50k = make_range_heavy_text(50000)
 
+    if arg_has("--bytes"):
+        # The fixtures are ASCII, so lengths (and MB/s) are unchanged
+        text_10k = text_10k.encode("ascii")
+        text_50k = text_50k.encode("ascii")
+        space_text_10k = space_text_10k.encode("ascii")
+        space_text_50k = space_text_50k.encode("ascii")
+        range_text_10k = range_text_10k.encode("ascii")
+        range_text_50k = range_text_50k.encode("ascii")
+
     # Digit matching benchmarks
     print("--- Digit Matching (\\d+) ---")
-    m.bench_function("nfa_simd_digits_10k", bench_python_simd_digits(text_10k))
-    m.bench_function("nfa_simd_digits_50k", bench_python_simd_digits(text_50k))
+    m.bench_function(
+        "nfa_simd_digits_10k",
+        bench_python_simd_digits(text_10k),
+        bytes_processed=len(text_10k),
+    )
+    m.bench_function(
+        "nfa_simd_digits_50k",
+        bench_python_simd_digits(text_50k),
+        bytes_processed=len(text_50k),
+    )
 
     # Whitespace matching benchmarks
     print("--- Whitespace Matching (\\s+) ---")
     m.bench_function(
-        "nfa_simd_whitespace_10k", bench_python_simd_whitespace(space_text_10k)
+        "nfa_simd_whitespace_10k",
+        bench_python_simd_whitespace(space_text_10k),
+        bytes_processed=len(space_text_10k),
     )
     m.bench_function(
-        "nfa_simd_whitespace_50k", bench_python_simd_whitespace(space_text_50k)
+        "nfa_simd_whitespace_50k",
+        bench_python_simd_whitespace(space_text_50k),
+        bytes_processed=len(space_text_50k),
     )
 
     # Character range matching benchmarks
     print("--- Character Range Matching ([a-zA-Z0-9]+) ---")
     m.bench_function(
-        "nfa_simd_range_10k", bench_python_simd_range(range_text_10k)
+        "nfa_simd_range_10k",
+        bench_python_simd_range(range_text_10k),
+        bytes_processed=len(range_text_10k),
     )
     m.bench_function(
-        "nfa_simd_range_50k", bench_python_simd_range(range_text_50k)
+        "nfa_simd_range_50k",
+        bench_python_simd_range(range_text_50k),
+        bytes_processed=len(range_text_50k),
     )
 
     # Negated character range matching benchmarks
@@ -312,10 +442,12 @@ def main():
     m.bench_function(
         "nfa_simd_negated_range_10k",
         bench_python_simd_negated_range(range_text_10k),
+        bytes_processed=len(range_text_10k),
     )
     m.bench_function(
         "nfa_simd_negated_range_50k",
         bench_python_simd_negated_range(range_text_50k),
+        bytes_processed=len(range_text_50k),
     )
 
     # Quantified character range matching benchmarks
@@ -323,17 +455,24 @@ def main():
     m.bench_function(
         "nfa_simd_quantified_range_10k",
         bench_python_simd_quantified_range(range_text_10k),
+        bytes_processed=len(range_text_10k),
     )
     m.bench_function(
         "nfa_simd_quantified_range_50k",
         bench_python_simd_quantified_range(range_text_50k),
+        bytes_processed=len(range_text_50k),
     )
 
     # Results summary
     m.dump_report()
 
-    # Export to JSON
-    m.export_json()
+    # Export to JSON; an alternative --engine gets its own results file
+    engine = "python_simd"
+    if engine_name() != "re":
+        engine = f"python_simd_{engine_name()}"
+    m.export_json(f"benchmarks/results/{engine}_results.json", engine)
+    if arg_has("--csv"):
+        m.export_csv(f"benchmarks/results/{engine}_results.csv")
 
 
 if __name__ == "__main__":
@@ -6,6 +6,9 @@ set -e  # Exit on error
 # Default benchmark type
 BENCHMARK_TYPE="${1:-bench_engine}"
 
+# Interpreter for the Python benchmarks (e.g. PYTHON=pypy3)
+PYTHON="${PYTHON:-python3}"
+
 # Validate argument
 if [[ "$BENCHMARK_TYPE" != "bench_engine" && "$BENCHMARK_TYPE" != "simd_focused_benchmark" ]]; then
     echo "Error: Invalid benchmark type '$BENCHMARK_TYPE'"
@@ -40,7 +43,7 @@ fi
 # Run Python benchmarks
 echo "Step 1: Running Python regex benchmarks..."
 echo "-----------------------------------------"
-python3 "benchmarks/python/${BENCHMARK_TYPE}.py"
+"$PYTHON" "benchmarks/python/${BENCHMARK_TYPE}.py"
 echo ""
 
 # Run Mojo benchmarks and parse output
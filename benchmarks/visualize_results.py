@@ -9,6 +9,11 @@ import sys
 import os
 
 try:
+    import matplotlib
+
+    # Charts are only written to PNG files; selecting the non-interactive
+    # backend skips pyplot's GUI toolkit probing at import time
+    matplotlib.use("Agg")
     import matplotlib.pyplot as plt
     import numpy as np
 except ImportError:
@@ -17,6 +22,40 @@ except ImportError:
     sys.exit(1)
 
 
+# Benchmark categories for the category chart, as (name substrings,
+# category) rules. The first rule with a substring in the benchmark name
+# wins, so the order matters (e.g. "literal_match" before "alternation").
+CATEGORY_RULES = (
+    (("literal_match",), "Literal Matching"),
+    (("range_", "char_class"), "Character Classes"),
+    (("quantifier", "wildcard"), "Quantifiers"),
+    (("anchor",), "Anchors"),
+    (("alternation",), "Alternation"),
+    (("group",), "Groups"),
+    (("complex",), "Complex Patterns"),
+    (("simd",), "SIMD Optimized"),
+    (("literal_prefix", "required_literal"), "Literal Optimization"),
+    (("match_all",), "Quantifiers"),
+)
+
+# Name prefixes that settle a benchmark's category before CATEGORY_RULES
+# are tried. The SIMD suite's range benchmarks (nfa_simd_range_10k, ...)
+# also contain "range_", which would otherwise file them under Character
+# Classes.
+CATEGORY_PREFIXES = (("nfa_simd_", "SIMD Optimized"),)
+
+
+def categorize_benchmark(name: str):
+    """Return the category of benchmark `name`, or None if it has none."""
+    for prefix, category in CATEGORY_PREFIXES:
+        if name.startswith(prefix):
+            return category
+    for substrings, category in CATEGORY_RULES:
+        if any(substring in name for substring in substrings):
+            return category
+    return None
+
+
 def load_comparison_data(filename: str) -> dict:
     """Load comparison data from JSON file.
 
@@ -78,19 +117,18 @@ def create_speedup_chart(comparison_data: dict, output_file: str):
     # Create figure
     fig, ax = plt.subplots(figsize=(14, 10))
 
-    # Create bars with color coding
-    colors = []
-    for speedup in speedups:
-        if speedup > 10:
-            colors.append("#00ff00")  # Bright green for huge speedups
-        elif speedup > 2:
-            colors.append("#66cc66")  # Green for good speedups
-        elif speedup > 1.1:
-            colors.append("#99cc99")  # Light green for slight speedups
-        elif speedup > 0.9:
-            colors.append("#cccccc")  # Gray for similar performance
-        else:
-            colors.append("#ff9999")  # Light red for slower
+    # Create bars with color coding. With right=True, digitize maps
+    # speedup <= 0.9 to 0, (0.9, 1.1] to 1, ... and > 10 to 4.
+    palette = np.array(
+        [
+            "#ff9999",  # Light red for slower
+            "#cccccc",  # Gray for similar performance
+            "#99cc99",  # Light green for slight speedups
+            "#66cc66",  # Green for good speedups
+            "#00ff00",  # Bright green for huge speedups
+        ]
+    )
+    colors = palette[np.digitize(speedups, [0.9, 1.1, 2, 10], right=True)]
 
     y_pos = np.arange(len(names))
     bars = ax.barh(y_pos, speedups, color=colors)
@@ -243,44 +281,13 @@ def create_category_analysis(comparison_data: dict, output_file: str):
     baseline_name = summary.get("baseline_name", "Baseline")
     test_name = summary.get("test_name", "Test")
 
-    # Categorize benchmarks
-    categories = {
-        "Literal Matching": [],
-        "Character Classes": [],
-        "Quantifiers": [],
-        "Anchors": [],
-        "Alternation": [],
-        "Groups": [],
-        "Complex Patterns": [],
-        "SIMD Optimized": [],
-        "Literal Optimization": [],
-    }
+    # Categorize benchmarks (chart order follows the first rule per category)
+    categories = {category: [] for _, category in CATEGORY_RULES}
 
     for name, data in benchmarks.items():
-        speedup = data["speedup"]
-
-        if "literal_match" in name:
-            categories["Literal Matching"].append(speedup)
-        elif "range_" in name or "char_class" in name:
-            categories["Character Classes"].append(speedup)
-        elif "quantifier" in name or "wildcard" in name:
-            categories["Quantifiers"].append(speedup)
-        elif "anchor" in name:
-            categories["Anchors"].append(speedup)
-        elif "alternation" in name:
-            categories["Alternation"].append(speedup)
-        elif "group" in name:
-            categories["Groups"].append(speedup)
-        elif "complex" in name:
-            categories["Complex Patterns"].append(speedup)
-        elif "simd" in name:
-            categories["SIMD Optimized"].append(speedup)
-        elif "literal_prefix" in name or "required_literal" in name:
-            categories["Literal Optimization"].append(speedup)
-        else:
-            # Try to categorize based on pattern
-            if "match_all" in name:
-                categories["Quantifiers"].append(speedup)
+        category = categorize_benchmark(name)
+        if category is not None:
+            categories[category].append(data["speedup"])
 
     # Calculate average speedup per category
     cat_names = []
@@ -1,20 +1,23 @@
 #!/usr/bin/env python3
 
 import re
-import time
+import timeit
 
-def benchmark_pattern(pattern, text, iterations=1000):
-    """Benchmark a pattern in Python."""
-    regex = re.compile(pattern)
+try:
+    # Optional: google-re2 runs the pattern as a DFA instead of backtracking
+    import re2
+except ImportError:
+    re2 = None
 
-    total_time = 0
-    for _ in range(iterations):
-        start = time.perf_counter()
-        regex.search(text)
-        end = time.perf_counter()
-        total_time += end - start
+def benchmark_pattern(regex, text, iterations=1000):
+    """Benchmark a compiled pattern in Python (best of 5 runs)."""
+    # Time whole runs so the clock is not read around every sub-microsecond
+    # search call
+    times = timeit.repeat(
+        lambda: regex.search(text), number=iterations, repeat=5
+    )
 
-    return (total_time / iterations) * 1000  # Convert to ms
+    return (min(times) / iterations) * 1000  # Convert to ms
 
 if __name__ == "__main__":
     print("=== PYTHON PERFORMANCE COMPARISON ===")
@@ -28,24 +31,45 @@ if __name__ == "__main__":
         ("Contact us at 3052001234 or 212345672890 for more info.", "Mixed text")
     ]
 
+    regex = re.compile(complex_pattern)
+
     print("Complex US phone pattern:")
     print("Pattern:", complex_pattern[:60] + "...")
     print()
 
+    case_times = []
     for text, name in test_cases:
-        time_ms = benchmark_pattern(complex_pattern, text, 1000)
-        matches = bool(re.search(complex_pattern, text))
+        time_ms = benchmark_pattern(regex, text, 1000)
+        case_times.append(time_ms)
+        matches = bool(regex.search(text))
         print(f"{name:20s}: {time_ms:.6f} ms (matches: {matches})")
 
-    # Average
-    total_time = sum(benchmark_pattern(complex_pattern, text, 1000) for text, _ in test_cases)
-    avg_time = total_time / len(test_cases)
+    # Average of the timings above
+    avg_time = sum(case_times) / len(case_times)
     print(f"{'Average':20s}: {avg_time:.6f} ms")
 
+    re2_avg_time = None
+    if re2 is not None:
+        regex_re2 = re2.compile(complex_pattern)
+
+        print()
+        print("Same pattern with re2:")
+        re2_case_times = []
+        for text, name in test_cases:
+            time_ms = benchmark_pattern(regex_re2, text, 1000)
+            re2_case_times.append(time_ms)
+            matches = bool(regex_re2.search(text))
+            print(f"{name:20s}: {time_ms:.6f} ms (matches: {matches})")
+
+        re2_avg_time = sum(re2_case_times) / len(re2_case_times)
+        print(f"{'Average':20s}: {re2_avg_time:.6f} ms")
+
     print()
     print("=== COMPARISON WITH MOJO ===")
     print("Mojo average: ~0.00012 ms")
     print("Python average: {:.6f} ms".format(avg_time))
+    if re2_avg_time is not None:
+        print("Python re2 average: {:.6f} ms".format(re2_avg_time))
     if avg_time > 0.00012:
         ratio = avg_time / 0.00012
         print(f"Mojo is {ratio:.1f}x faster than Python for this pattern!")